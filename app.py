@@ -1,10 +1,18 @@
 import datetime as dt
+import hashlib
+import io
+import os
+import re
+import threading
+import time
 import numpy as np
 import pandas as pd
-import yfinance as yf
-import plotly.express as px
+import pyarrow as pa
+import pyarrow.csv as pacsv
 import streamlit as st
 
+from indicators import all_mas
+
 # ---------- PAGE CONFIG ----------
 st.set_page_config(
     page_title="Stock Analytics Dashboard",
@@ -14,7 +22,7 @@ st.set_page_config(
 # ---------- SIDEBAR ----------
 st.sidebar.title("📈 Stock Analytics Dashboard")
 
-ticker = st.sidebar.text_input("Ticker symbol", value="AAPL", help="Example: AAPL, MSFT, TSLA, SPY")
+ticker = st.sidebar.text_input("Ticker symbol", value="AAPL", help="One or more symbols, e.g. AAPL or AAPL, MSFT, SPY")
 col1, col2 = st.sidebar.columns(2)
 
 with col1:
@@ -32,59 +40,196 @@ st.sidebar.markdown("---")
 st.sidebar.caption("Powered by Streamlit + yfinance")
 
 # ---------- FETCH DATA ----------
-@st.cache_data(show_spinner=True)
-def load_price_data(ticker, start, end, interval):
+CACHE_DIR = ".cache"
+CACHE_DEBUG = os.environ.get("CACHE_DEBUG") == "1"
+DISK_TTL = 86400
+LIVE_TTL = 300
+
+
+def parse_symbols(ticker):
+    # Order-preserving dedupe so "AAPL, aapl" is one symbol rather than a doubled frame
+    return list(dict.fromkeys(sym.upper() for sym in re.split(r"[,\s]+", ticker) if sym))
+
+
+def download_one(symbol, start, end, interval):
+    import yfinance as yf
+
+    data = yf.download(symbol, start=start, end=end, interval=interval, progress=False)
+    if data.empty:
+        return None
+    if isinstance(data.columns, pd.MultiIndex):
+        data.columns = data.columns.get_level_values(0)
+    return data.rename_axis("Date")
+
+
+def download_many(symbols, start, end, interval):
+    # One batched call: yf.download shares module-level state, so concurrent calls can mix up results
+    import yfinance as yf
+
+    raw = yf.download(
+        symbols,
+        start=start,
+        end=end,
+        interval=interval,
+        group_by="ticker",
+        threads=min(8, len(symbols)),
+        progress=False,
+    )
+    frames = []
+    if not raw.empty:
+        downloaded = set(raw.columns.get_level_values(0))
+        for sym in symbols:
+            if sym not in downloaded:
+                continue
+            # Failed symbols come back as all-NaN columns; skip them instead of failing the batch
+            frame = raw[sym].dropna(how="all")
+            if not frame.empty:
+                frames.append(frame.rename_axis("Date").assign(Symbol=sym))
+    if not frames:
+        return None
+    return pd.concat(frames)
+
+
+def cache_window(end):
+    # Ranges ending today are keyed on a 5-minute bucket so reruns hit the cache but data stays fresh
+    today = dt.date.today()
+    if end < today:
+        return end, None
+    return today, int(time.time() // LIVE_TTL)
+
+
+@st.cache_data(show_spinner=True, max_entries=64)
+def load_price_data(ticker, start, end, interval, as_of=None):
+    key = hashlib.md5(f"{ticker}|{start}|{end}|{interval}".encode("utf-8")).hexdigest()
+    path = os.path.join(CACHE_DIR, f"{key}.parquet")
+    # Live ranges accept only files written in the current 5-minute as_of bucket
+    if as_of is None:
+        fresh_after = time.time() - DISK_TTL
+    else:
+        fresh_after = as_of * LIVE_TTL
+
+    if os.path.exists(path) and os.path.getmtime(path) >= fresh_after:
+        try:
+            cached = pd.read_parquet(path)
+            # Files from an older layout (Date as a column) are treated as a miss
+            if isinstance(cached.index, pd.DatetimeIndex) and "Date" not in cached.columns:
+                if CACHE_DEBUG:
+                    st.write(f"Disk cache hit: {path}")
+                return cached
+        except Exception:
+            pass
+    if CACHE_DEBUG:
+        st.write(f"Disk cache miss: {path}")
+
+    symbols = parse_symbols(ticker)
+    if not symbols:
+        return None
     try:
-        data = yf.download(ticker, start=start, end=end, interval=interval, progress=False)
-        if data.empty:
+        if len(symbols) > 1:
+            data = download_many(symbols, start, end, interval)
+        else:
+            data = download_one(symbols[0], start, end, interval)
+        if data is None:
             return None
-        data = data.rename_axis("Date").reset_index()
-        return data
+        data = data.convert_dtypes(dtype_backend="pyarrow")
     except Exception:
         return None
 
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        data.to_parquet(tmp_path, engine="pyarrow", compression="zstd")
+        os.replace(tmp_path, path)
+    except Exception:
+        pass
+    return data
+
+# ---------- MOVING AVERAGES ----------
+@st.cache_resource
+def warm_ma_kernel():
+    # (2, 2) F-order is only F-contiguous, matching the multi-column frame slice; a single
+    # column (Close only) is both C- and F-contiguous and types as C, so warm that too
+    all_mas(np.zeros((2, 2), order="F"), 1, 2)
+    all_mas(np.zeros((2, 1)), 1, 2)
+    return True
+
+
+warm_ma_kernel()
+
+# ---------- DERIVED SERIES ----------
+# st.cache_data hashes the NumPy inputs, so widget-only reruns reuse these results
+@st.cache_data(show_spinner=False)
+def compute_all_mas(prices2d, w_short, w_long):
+    return all_mas(prices2d, w_short, w_long)
+
+
+@st.cache_data(show_spinner=False)
+def compute_histogram(returns_arr, bins=40):
+    counts, edges = np.histogram(returns_arr[np.isfinite(returns_arr)], bins=bins)
+    centers = 0.5 * (edges[:-1] + edges[1:])
+    return centers, counts, edges[1] - edges[0]
+
+# ---------- PLOTTING ----------
+MAX_PLOT_POINTS = 5000
+
+
+def plot_step(n):
+    # Stride decimation so long daily ranges stay around MAX_PLOT_POINTS points
+    return slice(None, None, max(1, -(-n // MAX_PLOT_POINTS)))
+
 # ---------- MAIN ----------
 st.title("📊 Stock Analytics Dashboard")
 
-data = load_price_data(ticker, start_date, end_date, interval)
+end_key, as_of = cache_window(end_date)
+data = load_price_data(ticker, start_date, end_key, interval, as_of)
 
 if data is None:
     st.error("Could not download data. Check ticker or date range.")
     st.stop()
 
+cols = frozenset(data.columns)
+
+symbol = ticker.upper()
+if "Symbol" in cols:
+    symbol = st.sidebar.selectbox("Compare symbol", options=list(data["Symbol"].unique()))
+    data = data[data["Symbol"] == symbol]
+
+# Reruns with unchanged inputs (e.g. tab switches) reuse the KPIs stored in session_state
+fp = hashlib.md5(repr((ticker, start_date, end_key, interval, as_of, symbol)).encode("utf-8")).hexdigest()
+fresh = st.session_state.get("fp") != fp or "kpis" not in st.session_state
+
 # Ensure Close exists
-if "Close" not in data.columns:
+if fresh and "Close" not in cols:
     st.error("The dataset does not include a 'Close' price. Cannot continue.")
     st.stop()
 
-# ---------- BASIC STATS ----------
-data["Return"] = data["Close"].pct_change()
-returns = data["Return"].dropna()
-
 # ---------- FIXED KPI SECTION ----------
-data["Return"] = data["Close"].pct_change()
-returns = data["Return"].dropna()
-
-# Safe last/prev close
-if len(data) >= 2:
-    last_close = float(data["Close"].iloc[-1])
-    prev_close = float(data["Close"].iloc[-2])
-    daily_change_pct = ((last_close - prev_close) / prev_close) * 100
-else:
-    last_close = float(data["Close"].iloc[-1])
-    prev_close = float("nan")
-    daily_change_pct = 0.0
+close = data["Close"].to_numpy(dtype=np.float64, na_value=np.nan)
+returns_arr = np.divide(np.diff(close), close[:-1])
+returns_full = np.concatenate([[np.nan], returns_arr])
+n_returns = np.count_nonzero(~np.isnan(returns_arr))
+
+if fresh:
+    # Safe last/prev close
+    last_close = close[-1].item()
+    prev_close = close[-2].item() if close.size >= 2 else float("nan")
+    daily_change_pct = ((last_close - prev_close) / prev_close) * 100 if close.size >= 2 else 0.0
+
+    # Safe avg volume
+    if "Volume" in cols:
+        avg_volume = np.nanmean(data["Volume"].to_numpy(dtype=np.float64, na_value=np.nan)).item()
+    else:
+        avg_volume = float("nan")
 
-# Safe avg volume
-if "Volume" in data.columns:
-    avg_volume = float(data["Volume"].mean())
-else:
-    avg_volume = float("nan")
+    if n_returns < 2:
+        annualized_vol = float("nan")
+    else:
+        annualized_vol = (np.nanstd(returns_arr, ddof=1) * np.sqrt(252)).item()
 
-if returns.empty:
-    annualized_vol = float("nan")
+    st.session_state["fp"] = fp
+    st.session_state["kpis"] = (last_close, daily_change_pct, avg_volume, annualized_vol)
 else:
-    annualized_vol = float(returns.std() * np.sqrt(252))
+    last_close, daily_change_pct, avg_volume, annualized_vol = st.session_state["kpis"]
 
 # ----- Display KPIs -----
 k1, k2, k3, k4 = st.columns(4)
@@ -103,9 +248,18 @@ k4.metric("Average Volume", avg_vol_display)
 
 
 # ---------- TABS ----------
+# Imported only once the page is past the early st.stop() exits; every tab body runs on each rerun
+import plotly.graph_objects as go
+
+# Dates stay on the DatetimeIndex and are handed to Plotly as a datetime64 view
+dates = data.index.values
+step = plot_step(dates.size)
+
 tab_price, tab_returns, tab_table = st.tabs(["📉 Price & Moving Averages", "📊 Returns & Volatility", "📋 Data & Download"])
 
 # ---------- PRICE & MAs ----------
+price_columns = [c for c in ["Close", "Open", "High", "Low"] if c in cols]
+
 with tab_price:
     st.subheader("Price with Moving Averages")
 
@@ -115,17 +269,23 @@ with tab_price:
     with c2:
         ma_long = st.number_input("Long MA (days)", min_value=50, max_value=200, value=50)
     with c3:
-        price_column = st.selectbox("Price type", options=["Close", "Open", "High", "Low"])
-
-    data[f"MA{ma_short}"] = data[price_column].rolling(ma_short).mean()
-    data[f"MA{ma_long}"] = data[price_column].rolling(ma_long).mean()
-
-    fig_price = px.line(
-        data,
-        x="Date",
-        y=[price_column, f"MA{ma_short}", f"MA{ma_long}"],
-        title=f"{ticker.upper()} Price & Moving Averages",
-        labels={"value": "Price", "Date": "Date", "variable": "Series"}
+        price_column = st.selectbox("Price type", options=price_columns)
+
+    # MAs for every price type come from one cached kernel call, so switching type only slices
+    prices2d = np.asfortranarray(data[price_columns].to_numpy(dtype=np.float64, na_value=np.nan))
+    mas = compute_all_mas(prices2d, int(ma_short), int(ma_long))
+    j = price_columns.index(price_column)
+    prices = prices2d[:, j]
+    ma_s, ma_l = mas[:, j, 0], mas[:, j, 1]
+
+    fig_price = go.Figure()
+    for name, values in ((price_column, prices), (f"MA{ma_short}", ma_s), (f"MA{ma_long}", ma_l)):
+        fig_price.add_trace(go.Scattergl(x=dates[step], y=values[step], mode="lines", name=name))
+    fig_price.update_layout(
+        title=f"{symbol} Price & Moving Averages",
+        xaxis_title="Date",
+        yaxis_title="Price",
+        legend_title_text="Series",
     )
     st.plotly_chart(fig_price, use_container_width=True)
 
@@ -133,43 +293,56 @@ with tab_price:
 with tab_returns:
     st.subheader("Daily Returns & Volatility")
 
-    if returns.empty:
+    if n_returns == 0:
         st.warning("Not enough data for returns.")
     else:
         col_r1, col_r2 = st.columns([2, 1])
 
         with col_r1:
-            fig_ret = px.line(
-                data,
-                x="Date",
-                y="Return",
-                title="Daily Returns",
-            )
+            fig_ret = go.Figure(go.Scattergl(x=dates[step], y=returns_full[step], mode="lines", name="Return"))
+            fig_ret.update_layout(title="Daily Returns", xaxis_title="Date", yaxis_title="Return")
             st.plotly_chart(fig_ret, use_container_width=True)
 
         with col_r2:
             st.write("Return Summary Statistics")
-            st.dataframe(returns.describe().to_frame().rename(columns={"Return": "Value"}))
+            r = returns_arr[~np.isnan(returns_arr)]
+            q = np.percentile(r, [0, 25, 50, 75, 100])
+            stats = {
+                "count": r.size,
+                "mean": r.mean(),
+                "std": r.std(ddof=1) if r.size > 1 else np.nan,
+                "min": q[0],
+                "25%": q[1],
+                "50%": q[2],
+                "75%": q[3],
+                "max": q[4],
+            }
+            st.dataframe(pd.DataFrame.from_dict(stats, orient="index", columns=["Value"]))
 
         st.markdown("#### Return Distribution")
-        fig_hist = px.histogram(
-            returns,
-            nbins=40,
-            title="Histogram of Daily Returns",
-        )
+        centers, counts, width = compute_histogram(returns_arr, bins=40)
+        fig_hist = go.Figure(go.Bar(x=centers, y=counts, width=width, name="Return"))
+        fig_hist.update_layout(title="Histogram of Daily Returns", xaxis_title="Return", yaxis_title="Count")
         st.plotly_chart(fig_hist, use_container_width=True)
 
 # ---------- DATA ----------
 with tab_table:
     st.subheader("Raw Price Data")
 
-    st.dataframe(data.set_index("Date"))
+    # Derived columns are attached only for display so the cached frame is left untouched
+    display = data.assign(Return=returns_full, **{f"MA{ma_short}": ma_s, f"MA{ma_long}": ma_l})
+    st.dataframe(display)
 
-    csv = data.to_csv(index=False).encode("utf-8")
+    buf = io.BytesIO()
+    # Date goes first as date32 so it is written as 2020-01-02 rather than a full nanosecond timestamp
+    table = pa.Table.from_pandas(display, preserve_index=False)
+    table = table.add_column(0, "Date", pa.array(dates.astype("datetime64[D]")))
+    pacsv.write_csv(table, buf)
+    csv = buf.getvalue()
     st.download_button(
         "Download CSV",
         data=csv,
-        file_name=f"{ticker.upper()}_data.csv",
+        file_name=f"{symbol}_data.csv",
         mime="text/csv",
     )
 
@@ -0,0 +1,48 @@
+import numpy as np
+from numba import njit, prange
+
+
+@njit(cache=True)
+def compute_two_mas(prices, w_short, w_long):
+    # Missing values are kept out of the running sums and counted per window, matching rolling().mean()
+    n = prices.shape[0]
+    ma_s = np.empty(n)
+    ma_l = np.empty(n)
+    sum_s = 0.0
+    sum_l = 0.0
+    nan_s = 0
+    nan_l = 0
+    for i in range(n):
+        x = prices[i]
+        if np.isfinite(x):
+            sum_s += x
+            sum_l += x
+        else:
+            nan_s += 1
+            nan_l += 1
+        if i >= w_short:
+            old = prices[i - w_short]
+            if np.isfinite(old):
+                sum_s -= old
+            else:
+                nan_s -= 1
+        if i >= w_long:
+            old = prices[i - w_long]
+            if np.isfinite(old):
+                sum_l -= old
+            else:
+                nan_l -= 1
+        ma_s[i] = sum_s / w_short if i >= w_short - 1 and nan_s == 0 else np.nan
+        ma_l[i] = sum_l / w_long if i >= w_long - 1 and nan_l == 0 else np.nan
+    return ma_s, ma_l
+
+
+@njit(parallel=True, cache=True)
+def all_mas(prices2d, w_short, w_long):
+    n, k = prices2d.shape
+    out = np.empty((n, k, 2))
+    for j in prange(k):
+        ma_s, ma_l = compute_two_mas(prices2d[:, j], w_short, w_long)
+        out[:, j, 0] = ma_s
+        out[:, j, 1] = ma_l
+    return out
@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from indicators import all_mas, compute_two_mas
+
+
+def rolling_mean(x, w):
+    return pd.Series(x).rolling(w).mean().to_numpy()
+
+
+@pytest.mark.parametrize(
+    "prices",
+    [
+        np.array([np.nan, 2.0, 3.0, 4.0, 5.0, 6.0, 7.0, 8.0, 9.0]),
+        np.array([1.0, 2.0, 3.0, np.nan, 5.0, 6.0, 7.0, 8.0, 9.0]),
+        np.array([1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 7.0, 8.0, 9.0]),
+    ],
+    ids=["gap-at-start", "gap-in-middle", "no-gap"],
+)
+def test_compute_two_mas_matches_rolling_mean(prices):
+    ma_s, ma_l = compute_two_mas(prices, 2, 4)
+    np.testing.assert_allclose(ma_s, rolling_mean(prices, 2))
+    np.testing.assert_allclose(ma_l, rolling_mean(prices, 4))
+
+
+def test_compute_two_mas_shorter_than_window():
+    prices = np.array([1.0, 2.0, 3.0])
+    ma_s, ma_l = compute_two_mas(prices, 5, 10)
+    assert np.isnan(ma_s).all()
+    assert np.isnan(ma_l).all()
+
+
+def test_all_mas_matches_per_column_kernel():
+    prices2d = np.asfortranarray(np.column_stack([
+        np.arange(1.0, 11.0),
+        np.r_[np.arange(1.0, 5.0), np.nan, np.arange(6.0, 11.0)],
+    ]))
+    out = all_mas(prices2d, 2, 3)
+    for j in range(prices2d.shape[1]):
+        np.testing.assert_allclose(out[:, j, 0], rolling_mean(prices2d[:, j], 2))
+        np.testing.assert_allclose(out[:, j, 1], rolling_mean(prices2d[:, j], 3))